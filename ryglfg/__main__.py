@@ -10,13 +10,20 @@ import typing as t
 # External imports
 import logging
 import uvicorn
+import asyncio
 import threading
+import concurrent.futures
 import datetime
 import fastapi as f
+import fastapi.concurrency as fc
 import fastapi.middleware.cors as cors
+import fastapi.middleware.gzip as gzip
+import fastapi.responses as fr
 import sqlalchemy.orm as so
 import sqlalchemy.sql as ss
-import requests
+import sqlalchemy.dialects.postgresql as spg
+import httpx
+import orjson
 import dataclasses
 import pkg_resources
 
@@ -33,6 +40,7 @@ app = f.FastAPI(
     title="RYGlfg",
     description='The "Looking For Group" service of the RYG community',
     version=pkg_resources.get_distribution("ryglfg").version,
+    default_response_class=fr.ORJSONResponse,
 )
 app.add_middleware(
     cors.CORSMiddleware,
@@ -40,6 +48,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    gzip.GZipMiddleware,
+    minimum_size=1024,
+)
 CurrentUser = auth.Auth0User(domain=config["authzero.domain"])
 
 
@@ -53,9 +65,7 @@ def dep_loginsession(
         cu: auth.Auth0AccessClaims = f.Depends(CurrentUser),
         session: so.Session = f.Depends(database.DatabaseSession),
 ):
-    db_user: t.Optional[database.User] = session.execute(
-        ss.select(database.User).where(database.User.sub == cu.sub)
-    ).scalar()
+    db_user: t.Optional[database.User] = session.get(database.User, cu.sub)
     if db_user is None:
         db_user = database.User(
             sub=cu.sub,
@@ -75,14 +85,111 @@ def dep_loginsession(
     return LoginSession(cu=cu, session=session)
 
 
+def require_scopes(*scopes: str) -> t.Callable[..., t.Awaitable[LoginSession]]:
+    """
+    Create a dependency returning the :class:`LoginSession`, but only if the current user has all the given scopes.
+    """
+    required = frozenset(scopes)
+
+    async def dep_scopes(ls: LoginSession = f.Depends(dep_loginsession)) -> LoginSession:
+        missing = required - ls.cu.permissions
+        if missing:
+            names = ", ".join(f"`{scope}`" for scope in sorted(missing))
+            raise f.HTTPException(403, f"Missing {names} scope.")
+        return ls
+
+    return dep_scopes
+
+
+def select_announcements_full() -> ss.Select:
+    """
+    Create a query selecting announcements together with everything needed to build a :class:`models.AnnouncementFull`.
+
+    Any other relationship is set to raise when accessed, so that it can't be lazily loaded by accident.
+    """
+    return ss.select(database.Announcement).options(
+        so.selectinload(database.Announcement.responses).joinedload(database.Response.partecipant),
+        so.joinedload(database.Announcement.creator),
+        so.joinedload(database.Announcement.closer),
+        so.raiseload("*"),
+    )
+
+
+# Built as a lambda statement, so that SQLAlchemy can cache its compiled form
+lfg_list_query = ss.lambda_stmt(lambda: select_announcements_full().order_by(
+    database.Announcement.autostart_time,
+    database.Announcement.aid,
+))
+
+
+def get_announcement_full(session: so.Session, aid: int) -> t.Optional[models.AnnouncementFull]:
+    lfg = session.execute(
+        select_announcements_full().where(database.Announcement.aid == aid)
+    ).scalar()
+    if lfg is None:
+        return None
+    return models.AnnouncementFull.from_orm_fast(lfg)
+
+
 planned_event = threading.Event()
 open_event = threading.Event()
 
 
-def send_message(session, message):
-    for webhook in session.execute(ss.select(database.Webhook)).scalars():
-        if webhook.format == database.WebhookFormat.RYGLFG:
-            requests.post(webhook.url, data=message)
+webhook_cache: t.Optional[t.Tuple[models.WebhookFull, ...]] = None
+webhook_cache_lock = threading.Lock()
+
+
+def get_webhooks() -> t.Tuple[models.WebhookFull, ...]:
+    """
+    Get the webhooks messages should be sent to, querying the database only if they aren't cached yet.
+    """
+    global webhook_cache
+    with webhook_cache_lock:
+        if webhook_cache is None:
+            Session = database.lazy_Session.evaluate()
+            with Session() as session:
+                webhook_cache = tuple(
+                    models.WebhookFull.from_orm_fast(webhook)
+                    for webhook in session.execute(
+                        ss.select(database.Webhook).where(database.Webhook.format == database.WebhookFormat.RYGLFG)
+                    ).scalars()
+                )
+        return webhook_cache
+
+
+def invalidate_webhooks() -> None:
+    """
+    Drop the cached webhooks, so that they will be queried again the next time a message is sent.
+    """
+    global webhook_cache
+    with webhook_cache_lock:
+        webhook_cache = None
+
+
+async def send_message(message: bytes):
+    webhooks = webhook_cache
+    if webhooks is None:
+        webhooks = await fc.run_in_threadpool(get_webhooks)
+
+    results = await asyncio.gather(
+        *(
+            app.state.http.post(webhook.url, content=message, headers={"content-type": "application/json"})
+            for webhook in webhooks
+        ),
+        return_exceptions=True,
+    )
+
+    for webhook, result in zip(webhooks, results):
+        if isinstance(result, Exception):
+            log.warning(f"Could not send message to webhook {webhook.url!r}: {result!r}")
+
+
+def log_send_failure(future: concurrent.futures.Future) -> None:
+    """
+    Log the exception of a :func:`send_message` scheduled from another thread, which would otherwise go unnoticed.
+    """
+    if not future.cancelled() and future.exception() is not None:
+        log.error("Could not send message", exc_info=future.exception())
 
 
 # Waiter threads
@@ -90,7 +197,7 @@ def planned_event_manager():
     log.info("Starting planned event manager...")
     Session = database.lazy_Session.evaluate()
     while True:
-        with Session(future=True) as session:
+        with Session() as session:
             lfg = session.execute(
                 ss.select(database.Announcement)
                   .where(database.Announcement.state == database.AnnouncementState.PLANNED)
@@ -108,20 +215,19 @@ def planned_event_manager():
                 raise TimeoutError()
             planned_event.wait(timeout=timeout)
         except TimeoutError:
-            with Session(future=True) as session:
-                lfg = session.execute(
-                    ss.select(database.Announcement)
-                      .where(database.Announcement.aid == aid)
-                ).scalar()
+            with Session() as session:
+                lfg = session.get(database.Announcement, aid)
                 lfg.state = database.AnnouncementState.OPEN
                 session.commit()
 
                 open_event.set()
 
-                send_message(session, models.EventAnnouncement(
-                    type="open",
-                    announcement=models.AnnouncementFull.from_orm(lfg),
-                ).json())
+                message = orjson.dumps({
+                    "type": "open",
+                    "announcement": models.AnnouncementFull.from_orm_fast(lfg).dict(),
+                })
+                future = asyncio.run_coroutine_threadsafe(send_message(message), app.state.loop)
+                future.add_done_callback(log_send_failure)
         else:
             planned_event.clear()
 
@@ -130,7 +236,7 @@ def open_event_manager():
     log.info("Starting open event manager...")
     Session = database.lazy_Session.evaluate()
     while True:
-        with Session(future=True) as session:
+        with Session() as session:
             lfg = session.execute(
                 ss.select(database.Announcement)
                   .where(database.Announcement.state == database.AnnouncementState.OPEN)
@@ -148,49 +254,66 @@ def open_event_manager():
                 raise TimeoutError()
             open_event.wait(timeout=timeout)
         except TimeoutError:
-            with Session(future=True) as session:
-                lfg = session.execute(
-                    ss.select(database.Announcement)
-                      .where(database.Announcement.aid == aid)
-                ).scalar()
+            with Session() as session:
+                lfg = session.get(database.Announcement, aid)
                 lfg.state = database.AnnouncementState.STARTED
                 lfg.closure_time = datetime.datetime.now(tz=datetime.timezone.utc)
                 session.commit()
 
-                send_message(session, models.EventAnnouncement(
-                    type="autostart",
-                    announcement=models.AnnouncementFull.from_orm(lfg),
-                ).json())
+                message = orjson.dumps({
+                    "type": "autostart",
+                    "announcement": models.AnnouncementFull.from_orm_fast(lfg).dict(),
+                })
+                future = asyncio.run_coroutine_threadsafe(send_message(message), app.state.loop)
+                future.add_done_callback(log_send_failure)
         else:
             open_event.clear()
 
 
+# Lifecycle events
+@app.on_event("startup")
+async def on_startup():
+    app.state.loop = asyncio.get_running_loop()
+    app.state.http = httpx.AsyncClient(
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        timeout=httpx.Timeout(3.0, connect=1.0),
+    )
+    threading.Thread(name="Event Manager (planned)", target=planned_event_manager, daemon=True).start()
+    threading.Thread(name="Event Manager (open)", target=open_event_manager, daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await app.state.http.aclose()
+
+
 # API routes
 @app.get(
     "/auth",
     summary="Check your user status.",
-    response_model=auth.Auth0AccessClaims,
+    responses={200: {"model": auth.Auth0AccessClaims}},
     tags=["Authorization"],
 )
-def auth_get(
+async def auth_get(
         *,
         ls: LoginSession = f.Depends(dep_loginsession),
 ):
     """
     Decode and verify the signature of your current JWT, returning its contents.
     """
-    return ls.cu
+    # orjson can't serialize the permissions frozenset, so let pydantic encode it as a list instead
+    return f.Response(ls.cu.json(by_alias=True), media_type="application/json")
 
 
 @app.get(
     "/lfg",
     summary="Get all LFGs.",
-    response_model=t.List[models.AnnouncementFull],
+    responses={200: {"model": t.List[models.AnnouncementFull]}},
     tags=["LFGs"],
 )
-def lfg_get(
+async def lfg_get(
         *,
-        ls: LoginSession = f.Depends(dep_loginsession),
+        ls: LoginSession = f.Depends(require_scopes("read:lfg")),
 
         limit: int = f.Query(
             50, description="The number of LFGs that will be returned.", ge=0, le=500
@@ -201,33 +324,46 @@ def lfg_get(
         filter_state: t.Optional[database.AnnouncementState] = f.Query(
             None, description="Get only LFGs in the specified state."
         ),
+        after_autostart: t.Optional[datetime.datetime] = f.Query(
+            None, description="Start returning LFGs after the one with this autostart time and `after_aid`."
+        ),
+        after_aid: t.Optional[int] = f.Query(
+            None, description="Start returning LFGs after the one with this aid and `after_autostart`."
+        ),
 ):
     """
     Return all LFGs sorted starting by the earliest autostart time.
 
+    To get the next page, pass the `autostart_time` and the `aid` of the last returned LFG as `after_autostart` and
+    `after_aid`: unlike `offset`, this doesn't get slower the further you go.
+
     Requires the `read:lfg` scope.
     """
-    if "read:lfg" not in ls.cu.permissions:
-        raise f.HTTPException(403, "Missing `read:lfg` scope.")
-
-    query = ss.select(database.Announcement)
-    query = query.where(database.Announcement.state == filter_state) if filter_state is not None else query
-    query = query.offset(offset)
-    query = query.limit(limit)
-    query = query.order_by(database.Announcement.autostart_time)
-    results = ls.session.execute(query)
-    return list(results.scalars())
+    if (after_autostart is None) != (after_aid is None):
+        raise f.HTTPException(400, "`after_autostart` and `after_aid` must be specified together.")
+
+    query = lfg_list_query
+    if filter_state is not None:
+        query += lambda q: q.where(database.Announcement.state == filter_state)
+    if after_autostart is not None:
+        query += lambda q: q.where(
+            ss.tuple_(database.Announcement.autostart_time, database.Announcement.aid) > ss.tuple_(after_autostart, after_aid)
+        )
+    query += lambda q: q.offset(offset).limit(limit)
+    results = await fc.run_in_threadpool(lambda: ls.session.execute(query).scalars().all())
+    return fr.ORJSONResponse([models.AnnouncementFull.from_orm_fast(lfg).dict() for lfg in results])
 
 
 @app.post(
     "/lfg",
     summary="Post a new LFG.",
-    response_model=models.AnnouncementFull,
+    responses={200: {"model": models.AnnouncementFull}},
     tags=["LFGs"]
 )
-def lfg_post(
+async def lfg_post(
         *,
-        ls: LoginSession = f.Depends(dep_loginsession),
+        ls: LoginSession = f.Depends(require_scopes("create:lfg")),
+        background: f.BackgroundTasks,
         session: so.Session = f.Depends(database.DatabaseSession),
         user: t.Optional[str] = f.Query(None, description="The user on behalf of which you are acting."),
         data: models.AnnouncementEditable = f.Body(..., description="The data of the LFG you are creating."),
@@ -237,9 +373,6 @@ def lfg_post(
 
     Requires the `create:lfg` scope, or the `create:lfg_sudo` scope if you're creating a LFG on behalf of another user.
     """
-    if "create:lfg" not in ls.cu.permissions:
-        raise f.HTTPException(403, "Missing `create:lfg` scope.")
-
     if user is None:
         user = ls.cu.sub
 
@@ -249,27 +382,33 @@ def lfg_post(
     # noinspection PyArgumentList
     lfg = database.Announcement(**data.dict(), creator_id=user)
     session.add(lfg)
-    session.commit()
+    await fc.run_in_threadpool(session.flush)
+    aid = lfg.aid
+    await fc.run_in_threadpool(session.commit)
 
     planned_event.set()
 
-    send_message(session, models.EventAnnouncement(
-        type="create",
-        announcement=models.AnnouncementFull.from_orm(lfg),
-    ).json())
+    announcement = await fc.run_in_threadpool(get_announcement_full, session, aid)
+    content = announcement.dict()
+    # Release the connection now, as dependencies are only closed after the background tasks are done
+    await fc.run_in_threadpool(session.close)
+    background.add_task(send_message, orjson.dumps({
+        "type": "create",
+        "announcement": content,
+    }))
 
-    return lfg
+    return fr.ORJSONResponse(content)
 
 
 @app.get(
     "/lfg/{aid}",
     summary="Get info about a specific LFG.",
-    response_model=models.AnnouncementFull,
+    responses={200: {"model": models.AnnouncementFull}},
     tags=["LFGs"]
 )
-def lfg_get_single(
+async def lfg_get_single(
         *,
-        ls: LoginSession = f.Depends(dep_loginsession),
+        ls: LoginSession = f.Depends(require_scopes("read:lfg")),
         aid: int = f.Path(..., description="The aid of the LFG to retrieve."),
 ):
     """
@@ -277,27 +416,22 @@ def lfg_get_single(
 
     Requires the `read:lfg` scope.
     """
-    if "read:lfg" not in ls.cu.permissions:
-        raise f.HTTPException(403, "Missing `read:lfg` scope.")
+    announcement = await fc.run_in_threadpool(get_announcement_full, ls.session, aid)
 
-    lfg = ls.session.execute(
-        ss.select(database.Announcement).where(database.Announcement.aid == aid)
-    ).scalar()
-
-    if lfg is None:
+    if announcement is None:
         raise f.HTTPException(404, "No such LFG.")
-    return lfg
+    return fr.ORJSONResponse(announcement.dict())
 
 
 @app.put(
     "/lfg/{aid}",
     summary="Edit a LFG.",
-    response_model=models.AnnouncementFull,
+    responses={200: {"model": models.AnnouncementFull}},
     tags=["LFGs"]
 )
 def lfg_put(
         *,
-        ls: LoginSession = f.Depends(dep_loginsession),
+        ls: LoginSession = f.Depends(require_scopes("edit:lfg")),
         aid: int = f.Path(..., description="The aid of the LFG to edit."),
         data: models.AnnouncementEditable = f.Body(..., description="The new data of the LFG.")
 ):
@@ -310,12 +444,7 @@ def lfg_put(
 
     If you're trying to edit a started or cancelled LFG, additionally requires the `edit:lfg_admin` scope.
     """
-    if "edit:lfg" not in ls.cu.permissions:
-        raise f.HTTPException(403, "Missing `edit:lfg` scope.")
-
-    lfg = ls.session.execute(
-        ss.select(database.Announcement).where(database.Announcement.aid == aid)
-    ).scalar()
+    lfg = ls.session.get(database.Announcement, aid)
 
     if lfg is None:
         raise f.HTTPException(404, "No such LFG.")
@@ -329,12 +458,14 @@ def lfg_put(
     lfg.update(**data.dict())
     ls.session.commit()
 
-    if lfg.state == database.AnnouncementState.PLANNED:
+    announcement = get_announcement_full(ls.session, aid)
+
+    if announcement.state == database.AnnouncementState.PLANNED:
         planned_event.set()
-    elif lfg.state == database.AnnouncementState.OPEN:
+    elif announcement.state == database.AnnouncementState.OPEN:
         open_event.set()
 
-    return lfg
+    return fr.ORJSONResponse(announcement.dict())
 
 
 @app.delete(
@@ -345,7 +476,7 @@ def lfg_put(
 )
 def lfg_delete(
         *,
-        ls: LoginSession = f.Depends(dep_loginsession),
+        ls: LoginSession = f.Depends(require_scopes("delete:lfg_admin")),
         aid: int = f.Path(..., description="The aid of the LFG to delete."),
 ):
     """
@@ -355,21 +486,17 @@ def lfg_delete(
 
     Requires the `delete:lfg_admin` scope.
     """
-    if "delete:lfg_admin" not in ls.cu.permissions:
-        raise f.HTTPException(403, "Missing `delete:lfg_admin` scope.")
-
-    lfg = ls.session.execute(
-        ss.select(database.Announcement).where(database.Announcement.aid == aid)
-    ).scalar()
+    lfg = ls.session.get(database.Announcement, aid)
 
     if lfg is not None:
+        state = lfg.state
         ls.session.delete(lfg)
         ls.session.commit()
 
-    if lfg.state == database.AnnouncementState.PLANNED:
-        planned_event.set()
-    elif lfg.state == database.AnnouncementState.OPEN:
-        open_event.set()
+        if state == database.AnnouncementState.PLANNED:
+            planned_event.set()
+        elif state == database.AnnouncementState.OPEN:
+            open_event.set()
 
     return f.Response(status_code=204)
 
@@ -377,12 +504,13 @@ def lfg_delete(
 @app.patch(
     "/lfg/{aid}/start",
     summary="Start a LFG.",
-    response_model=models.AnnouncementFull,
+    responses={200: {"model": models.AnnouncementFull}},
     tags=["LFGs"],
 )
-def lfg_start(
+async def lfg_start(
         *,
-        ls: LoginSession = f.Depends(dep_loginsession),
+        ls: LoginSession = f.Depends(require_scopes("start:lfg")),
+        background: f.BackgroundTasks,
 
         aid: int = f.Path(..., description="The id of the LFG that you want to start."),
         user: t.Optional[str] = f.Query(None, description="The id of the user you are acting on behalf of."),
@@ -396,18 +524,13 @@ def lfg_start(
 
     Additionally requires the `start:lfg_admin` if you're trying to start another user's LFG.
     """
-    if "start:lfg" not in ls.cu.permissions:
-        raise f.HTTPException(403, "Missing `start:lfg` scope.")
-
     if user is None:
         user = ls.cu.sub
 
     if "start:lfg_sudo" not in ls.cu.permissions and user != ls.cu.sub:
         raise f.HTTPException(403, "Missing `start:lfg_sudo` scope.")
 
-    lfg = ls.session.execute(
-        ss.select(database.Announcement).where(database.Announcement.aid == aid)
-    ).scalar()
+    lfg = await fc.run_in_threadpool(ls.session.get, database.Announcement, aid)
 
     if lfg is None:
         raise f.HTTPException(404, "No such LFG.")
@@ -422,25 +545,29 @@ def lfg_start(
     lfg.closure_time = datetime.datetime.now(tz=datetime.timezone.utc)
     lfg.closure_id = user
 
-    ls.session.commit()
+    await fc.run_in_threadpool(ls.session.commit)
 
-    send_message(ls.session, models.EventAnnouncement(
-        type="start",
-        announcement=models.AnnouncementFull.from_orm(lfg),
-    ).json())
+    announcement = await fc.run_in_threadpool(get_announcement_full, ls.session, aid)
+    content = announcement.dict()
+    await fc.run_in_threadpool(ls.session.close)
+    background.add_task(send_message, orjson.dumps({
+        "type": "start",
+        "announcement": content,
+    }))
 
-    return lfg
+    return fr.ORJSONResponse(content)
 
 
 @app.patch(
     "/lfg/{aid}/cancel",
     summary="Cancel a LFG.",
-    response_model=models.AnnouncementFull,
+    responses={200: {"model": models.AnnouncementFull}},
     tags=["LFGs"],
 )
-def lfg_cancel(
+async def lfg_cancel(
         *,
-        ls: LoginSession = f.Depends(dep_loginsession),
+        ls: LoginSession = f.Depends(require_scopes("cancel:lfg")),
+        background: f.BackgroundTasks,
 
         aid: int = f.Path(..., description="The id of the LFG that you want to cancel."),
         user: t.Optional[str] = f.Query(None, description="The id of the user you are acting on behalf of."),
@@ -454,18 +581,13 @@ def lfg_cancel(
 
     Additionally requires the `cancel:lfg_admin` if you're trying to start another user's LFG.
     """
-    if "cancel:lfg" not in ls.cu.permissions:
-        raise f.HTTPException(403, "Missing `cancel:lfg` scope.")
-
     if user is None:
         user = ls.cu.sub
 
     if "cancel:lfg_sudo" not in ls.cu.permissions and user != ls.cu.sub:
         raise f.HTTPException(403, "Missing `cancel:lfg_sudo` scope.")
 
-    lfg = ls.session.execute(
-        ss.select(database.Announcement).where(database.Announcement.aid == aid)
-    ).scalar()
+    lfg = await fc.run_in_threadpool(ls.session.get, database.Announcement, aid)
 
     if lfg is None:
         raise f.HTTPException(404, "No such LFG.")
@@ -480,26 +602,29 @@ def lfg_cancel(
     lfg.closure_time = datetime.datetime.now(tz=datetime.timezone.utc)
     lfg.closure_id = user
 
-    ls.session.commit()
+    await fc.run_in_threadpool(ls.session.commit)
 
-    send_message(ls.session, models.EventAnnouncement(
-        type="cancel",
-        announcement=models.AnnouncementFull.from_orm(lfg),
-    ).json())
+    announcement = await fc.run_in_threadpool(get_announcement_full, ls.session, aid)
+    content = announcement.dict()
+    await fc.run_in_threadpool(ls.session.close)
+    background.add_task(send_message, orjson.dumps({
+        "type": "cancel",
+        "announcement": content,
+    }))
 
-    return lfg
+    return fr.ORJSONResponse(content)
 
 
 @app.put(
     "/lfg/{aid}/answer",
     summary="Answer an open LFG.",
-    response_model=models.ResponseFull,
+    responses={200: {"model": models.ResponseFull}, 201: {"model": models.ResponseFull}},
     tags=["Responses"],
 )
-def lfg_answer_put(
+async def lfg_answer_put(
         *,
-        ls: LoginSession = f.Depends(dep_loginsession),
-        fr: f.Response,
+        ls: LoginSession = f.Depends(require_scopes("answer:lfg")),
+        background: f.BackgroundTasks,
 
         aid: int = f.Path(..., description="The id of the LFG that should be answered."),
         user: t.Optional[str] = f.Query(None, description="The id of the user you are answering on behalf of."),
@@ -512,78 +637,70 @@ def lfg_answer_put(
 
     Additionally requires the `answer:lfg_sudo` scope if you are answering on behalf of another user.
     """
-    if "answer:lfg" not in ls.cu.permissions:
-        raise f.HTTPException(403, "Missing `answer:lfg` scope.")
-
     if user is None:
         user = ls.cu.sub
 
     if "answer:lfg_sudo" not in ls.cu.permissions and user != ls.cu.sub:
         raise f.HTTPException(403, "Missing `answer:lfg_sudo` scope.")
 
-    response = ls.session.execute(
-        ss.select(database.Response).where(
-            ss.and_(
-                database.Response.aid == aid,
-                database.Response.partecipant_id == ls.cu.sub,
-            )
-        )
-    ).scalar()
+    upsert = spg.insert(database.Response).values(**data.dict(), aid=aid, partecipant_id=user)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[database.Response.aid, database.Response.partecipant_id],
+        set_={**data.dict(), "editing_time": database.now()},
+    )
+    # xmax is 0 only for rows that have just been inserted
+    upsert = upsert.returning((ss.literal_column("xmax") == 0).label("inserted"))
 
-    if response is None:
-        # noinspection PyArgumentList
-        response = database.Response(**data.dict(), aid=aid, partecipant_id=user)
-        ls.session.add(response)
-        fr.status_code = 201
-    else:
-        response.update(**data.dict())
-        fr.status_code = 200
+    inserted = await fc.run_in_threadpool(lambda: ls.session.execute(upsert).scalar())
+    code = 201 if inserted else 200
 
-    ls.session.commit()
+    await fc.run_in_threadpool(ls.session.commit)
 
-    send_message(ls.session, models.EventResponse(
-        type="answer",
-        code=fr.status_code,
-        response=models.ResponseFull.from_orm(response),
-    ).json())
+    response_full = await fc.run_in_threadpool(
+        lambda: models.ResponseFull.from_orm_fast(ls.session.get(database.Response, (aid, user)))
+    )
+    content = response_full.dict()
+    await fc.run_in_threadpool(ls.session.close)
+    background.add_task(send_message, orjson.dumps({
+        "type": "answer",
+        "code": code,
+        "response": content,
+    }))
 
-    return response
+    return fr.ORJSONResponse(content, status_code=code)
 
 
 @app.get(
     "/webhook",
     summary="Get all configured webhooks.",
-    response_model=t.List[models.WebhookFull],
+    responses={200: {"model": t.List[models.WebhookFull]}},
     tags=["Webhooks"],
 )
-def webhooks_get(
+async def webhooks_get(
         *,
-        ls: LoginSession = f.Depends(dep_loginsession),
+        ls: LoginSession = f.Depends(require_scopes("read:webhooks")),
 ):
     """
     Return a list of all configured webhooks.
 
     Requires the `read:webhooks` scope.
     """
-    if "read:webhooks" not in ls.cu.permissions:
-        raise f.HTTPException(403, "Missing `read:webhooks` scope.")
-
-    results = ls.session.execute(
+    results = await fc.run_in_threadpool(lambda: ls.session.execute(
         ss.select(database.Webhook)
-    ).scalars()
+    ).scalars().all())
 
-    return list(results)
+    return fr.ORJSONResponse([models.WebhookFull.from_orm_fast(webhook).dict() for webhook in results])
 
 
 @app.post(
     "/webhook",
     summary="Create a new webhook.",
-    response_model=models.WebhookFull,
+    responses={200: {"model": models.WebhookFull}},
     tags=["Webhooks"],
 )
 def webhooks_post(
         *,
-        ls: LoginSession = f.Depends(dep_loginsession),
+        ls: LoginSession = f.Depends(require_scopes("create:webhooks")),
 
         data: models.WebhookEditable = f.Body(..., description="The data that the created webhook should have.")
 ):
@@ -596,14 +713,12 @@ def webhooks_post(
 
     Requires the `create:webhooks` scope.
     """
-    if "create:webhooks" not in ls.cu.permissions:
-        raise f.HTTPException(403, "Missing `create:webhooks` scope.")
-
     # noinspection PyArgumentList
     webhook = database.Webhook(**data.dict())
     ls.session.add(webhook)
     ls.session.commit()
-    return webhook
+    invalidate_webhooks()
+    return fr.ORJSONResponse(models.WebhookFull.from_orm_fast(webhook).dict())
 
 
 @app.delete(
@@ -614,7 +729,7 @@ def webhooks_post(
 )
 def webhooks_delete(
         *,
-        ls: LoginSession = f.Depends(dep_loginsession),
+        ls: LoginSession = f.Depends(require_scopes("delete:webhooks")),
 
         wid: int = f.Path(..., description="The id of the webhook to delete."),
 ):
@@ -623,18 +738,14 @@ def webhooks_delete(
 
     Requires the `delete:webhooks` scope.
     """
-    if "delete:webhooks" not in ls.cu.permissions:
-        raise f.HTTPException(403, "Missing `delete:webhooks` scope.")
-
-    webhook = ls.session.execute(
-        ss.select(database.Webhook).where(database.Webhook.wid == wid)
-    ).scalar()
+    webhook = ls.session.get(database.Webhook, wid)
 
     if webhook is None:
         raise f.HTTPException(404, "No such webhook.")
 
     ls.session.delete(webhook)
     ls.session.commit()
+    invalidate_webhooks()
     return f.Response(status_code=204)
 
 
@@ -644,9 +755,9 @@ def webhooks_delete(
     status_code=204,
     tags=["Webhooks"],
 )
-def webhooks_test(
+async def webhooks_test(
         *,
-        ls: LoginSession = f.Depends(dep_loginsession),
+        ls: LoginSession = f.Depends(require_scopes("test:webhooks")),
 
         wid: int = f.Path(..., description="The id of the webhook to delete."),
 ):
@@ -655,17 +766,15 @@ def webhooks_test(
 
     Requires the `test:webhooks` scope.
     """
-    if "test:webhooks" not in ls.cu.permissions:
-        raise f.HTTPException(403, "Missing `test:webhooks` scope.")
+    webhook = await fc.run_in_threadpool(ls.session.get, database.Webhook, wid)
 
-    webhook = ls.session.execute(
-        ss.select(database.Webhook).where(database.Webhook.wid == wid)
-    ).scalar()
+    if webhook is None:
+        raise f.HTTPException(404, "No such webhook.")
 
     if webhook.format == database.WebhookFormat.RYGLFG:
-        requests.post(webhook.url, data=models.Event(
-            type="test",
-        ).json())
+        await app.state.http.post(webhook.url, content=orjson.dumps({
+            "type": "test",
+        }), headers={"content-type": "application/json"})
 
     return f.Response(status_code=204)
 
@@ -673,6 +782,4 @@ def webhooks_test(
 # Run the API
 if __name__ == "__main__":
     database.init_db()
-    threading.Thread(name="Event Manager (planned)", target=planned_event_manager, daemon=True).start()
-    threading.Thread(name="Event Manager (open)", target=open_event_manager, daemon=True).start()
-    uvicorn.run(app, port=globals.lazy_config.e["api.port"])
+    uvicorn.run(app, port=globals.lazy_config.e["api.port"], loop="uvloop", http="httptools")
@@ -9,7 +9,11 @@ import royalnet.royaltyping as t
 
 # External imports
 import logging
+import time
+import collections
 import pydantic as p
+import fastapi as f
+import fastapi.security as fs
 import fastapi_cloudauth.auth0 as faca
 
 # Internal imports
@@ -28,14 +32,52 @@ class Auth0AccessClaims(p.BaseModel):
     exp: int
     azp: str
     scope: str
-    permissions: t.List[str]
+    permissions: t.FrozenSet[str]
     ryg_name: str = p.Field(..., alias="https://meta.ryg.one/name")
     ryg_picture: p.HttpUrl = p.Field(..., alias="https://meta.ryg.one/picture")
 
 
 class Auth0User(faca.Auth0CurrentUser):
+    """
+    A :class:`faca.Auth0CurrentUser` remembering the tokens it has recently verified, so that a client sending multiple
+    requests with the same token doesn't have its signature verified again every time.
+    """
+
     user_info = Auth0AccessClaims
 
+    cache_size: int = 4096
+    cache_ttl: float = 30.0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cache: collections.OrderedDict[str, t.Tuple[float, Auth0AccessClaims]] = collections.OrderedDict()
+
+    # http_auth is intentionally left unannotated, as FastAPI can't resolve postponed annotations of callable instances
+    async def __call__(
+            self,
+            http_auth=f.Depends(fs.HTTPBearer(auto_error=False)),
+    ) -> t.Optional[Auth0AccessClaims]:
+        if http_auth is None:
+            return await super().__call__(http_auth)
+
+        token = http_auth.credentials
+        now = time.time()
+
+        cached = self._cache.get(token)
+        if cached is not None:
+            cached_at, claims = cached
+            if now < cached_at + self.cache_ttl and now < claims.exp:
+                self._cache.move_to_end(token)
+                return claims
+            del self._cache[token]
+
+        claims = await super().__call__(http_auth)
+        if claims is not None:
+            self._cache[token] = (now, claims)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return claims
+
 
 # Objects exported by this module
 __all__ = (
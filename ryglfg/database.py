@@ -11,7 +11,6 @@ import royalnet.royaltyping as t
 import logging
 import sqlalchemy as s
 import sqlalchemy.orm as so
-import sqlalchemy.exc as sexc
 import royalnet.lazy as lazy
 import datetime
 import enum
@@ -27,8 +26,14 @@ now = datetime.datetime.now
 
 # Code
 Base = so.declarative_base()
-lazy_engine = lazy.Lazy(lambda c: s.create_engine(c["database.uri"]), c=lazy_config)
-lazy_Session = lazy.Lazy(lambda e: s.orm.sessionmaker(bind=e), e=lazy_engine)
+lazy_engine = lazy.Lazy(lambda c: s.create_engine(
+    c["database.uri"],
+    pool_size=c.get("database.poolsize", 20),
+    max_overflow=c.get("database.maxoverflow", 40),
+    pool_recycle=3600,
+    pool_pre_ping=True,
+), c=lazy_config)
+lazy_Session = lazy.Lazy(lambda e: s.orm.sessionmaker(bind=e, autoflush=False, future=True), e=lazy_engine)
 
 
 def init_db() -> None:
@@ -43,7 +48,7 @@ def init_db() -> None:
     Base.metadata.create_all(bind=engine)
 
     # log.debug("Initializing the table contents...")
-    # with Session(future=True) as session:
+    # with Session() as session:
     #     pass
 
     log.debug("Database initialization complete!")
@@ -92,6 +97,10 @@ class Announcement(Base, ra.ColRepr, ra.Updatable):
     creator = so.relationship("User", foreign_keys=[creator_id], backref="creations")
     closer = so.relationship("User", foreign_keys=[closer_id], backref="closures")
 
+    __table_args__ = (
+        s.Index("lfg_announcements_autostart_time_aid_index", autostart_time, aid),
+    )
+
 
 class ResponseChoice(str, enum.Enum):
     ACCEPTED = "accepted"
@@ -131,7 +140,7 @@ class Webhook(Base, ra.ColRepr, ra.Updatable):
 # noinspection PyPep8Naming
 def DatabaseSession():
     Session = lazy_Session.evaluate()
-    with Session(future=True) as session:
+    with Session() as session:
         yield session
 
 
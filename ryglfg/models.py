@@ -10,6 +10,7 @@ import royalnet.royaltyping as t
 # External imports
 import logging
 import pydantic as p
+import pydantic.fields as pf
 import datetime
 
 # Internal imports
@@ -28,6 +29,24 @@ class ORMModel(Model):
     class Config(p.BaseConfig):
         orm_mode = True
 
+    @classmethod
+    def from_orm_fast(cls, obj: t.Any) -> ORMModel:
+        """
+        Like :meth:`.from_orm`, but skip validation, trusting the values of ``obj`` to already be of the correct types.
+
+        Only use this on objects coming from the database, never on user input!
+        """
+        values = {}
+        for name, field in cls.__fields__.items():
+            value = getattr(obj, name)
+            if value is not None and isinstance(field.type_, type) and issubclass(field.type_, ORMModel):
+                if field.shape == pf.SHAPE_LIST:
+                    value = [field.type_.from_orm_fast(item) for item in value]
+                else:
+                    value = field.type_.from_orm_fast(value)
+            values[name] = value
+        return cls.construct(**values)
+
 
 class UserEditable(ORMModel):
     pass